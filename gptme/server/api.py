@@ -60,6 +60,13 @@ def _is_debug_errors_enabled() -> bool:
     return os.environ.get("GPTME_DEBUG_ERRORS", "").lower() in ("1", "true", "yes")
 
 
+def _generation_error_message(e: Exception) -> str:
+    """Error message for a failed generation, detailed only in debug mode."""
+    if _is_debug_errors_enabled():
+        return str(e)
+    return "An internal error occurred during generation"
+
+
 api = flask.Blueprint("api", __name__)
 
 
@@ -112,19 +119,65 @@ def _abs_to_rel_workspace(path: str | Path | URI, workspace: Path) -> str:
     return str(path)
 
 
+def _trim_messages(
+    msgs: list[dict], limit_messages: int | None, preview_chars: int | None
+) -> list[dict]:
+    """Keep only the most recent messages and/or truncate their content."""
+    if limit_messages is not None:
+        msgs = msgs[max(len(msgs) - limit_messages, 0) :]
+    if preview_chars is not None:
+        for msg in msgs:
+            msg["content"] = msg["content"][:preview_chars]
+    return msgs
+
+
 @api.route("/api/conversations/<string:logfile>")
 @api_doc_simple(
-    responses={200: ConversationResponse, 404: ErrorResponse, 403: ErrorResponse}
+    responses={
+        200: ConversationResponse,
+        400: ErrorResponse,
+        404: ErrorResponse,
+        403: ErrorResponse,
+    },
+    parameters=[
+        {
+            "name": "limit_messages",
+            "in": "query",
+            "schema": {"type": "integer", "minimum": 0},
+            "description": "Only return the most recent messages of the log and each branch",
+        },
+        {
+            "name": "preview_chars",
+            "in": "query",
+            "schema": {"type": "integer", "minimum": 0},
+            "description": "Truncate message content to this many characters",
+        },
+    ],
 )
 @require_auth
 def api_conversation(logfile: str):
     """Get conversation.
 
-    Retrieve a conversation with all its messages and metadata.
+    Retrieve a conversation with all its messages and metadata, optionally
+    trimmed to the most recent messages and/or truncated message content.
     """
+    limit_messages = request.args.get("limit_messages", type=int)
+    preview_chars = request.args.get("preview_chars", type=int)
+    for name, value in [
+        ("limit_messages", limit_messages),
+        ("preview_chars", preview_chars),
+    ]:
+        if value is not None and value < 0:
+            return flask.jsonify({"error": f"{name} must not be negative"}), 400
     init_tools(None)
     log = LogManager.load(logfile, lock=False)
     log_dict = log.to_dict(branches=True)
+    if limit_messages is not None or preview_chars is not None:
+        log_dict["log"] = _trim_messages(log_dict["log"], limit_messages, preview_chars)
+        log_dict["branches"] = {
+            branch: _trim_messages(msgs, limit_messages, preview_chars)
+            for branch, msgs in log_dict["branches"].items()
+        }
     # add workspace to response
     log_dict["workspace"] = str(log.workspace)
     # make all paths absolute or relative to workspace (no "../")
@@ -295,13 +348,22 @@ def api_conversation_post(logfile: str):
 @api.route("/api/conversations/<string:logfile>/generate", methods=["POST"])
 @api_doc_simple(
     request_body=GenerateRequest,
-    responses={200: GenerateResponse, 400: ErrorResponse, 500: ErrorResponse},
+    responses={
+        200: GenerateResponse,
+        400: ErrorResponse,
+        500: ErrorResponse,
+        503: ErrorResponse,
+    },
 )
 @require_auth
 def api_conversation_generate(logfile: str):
     """Generate response.
 
     Generate an AI response in the conversation, with optional streaming.
+
+    Failures before anything is stored in the conversation (no model available,
+    or the model/provider rejecting the request) return 503, so clients know
+    the request can safely be retried, e.g. with another model.
     """
     # get model or use server default
     req_json = flask.request.json or {}
@@ -316,7 +378,7 @@ def api_conversation_generate(logfile: str):
                 {
                     "error": "No model available (none loaded and none specified in request)"
                 }
-            ), 500
+            ), 503
         model = default_model.full
 
     # load conversation
@@ -340,7 +402,12 @@ def api_conversation_generate(logfile: str):
         try:
             # Get complete response
             output = "".join(_stream(msgs, model, tools=None))
+        except Exception as e:
+            # Nothing has been stored yet, so the request is safe to retry
+            logger.exception("Error during generation")
+            return flask.jsonify({"error": _generation_error_message(e)}), 503
 
+        try:
             # Store the message
             msg = Message("assistant", output)
             msg = msg.replace(quiet=True)
@@ -362,12 +429,7 @@ def api_conversation_generate(logfile: str):
 
         except Exception as e:
             logger.exception("Error during generation")
-            error_msg = (
-                str(e)
-                if _is_debug_errors_enabled()
-                else "An internal error occurred during generation"
-            )
-            return flask.jsonify({"error": error_msg}), 500
+            return flask.jsonify({"error": _generation_error_message(e)}), 500
 
     # Streaming response
     def generate() -> Generator[str, None, None]:
@@ -483,12 +545,7 @@ def api_conversation_generate(logfile: str):
             raise
         except Exception as e:
             logger.exception("Error during generation")
-            error_msg = (
-                str(e)
-                if _is_debug_errors_enabled()
-                else "An internal error occurred during generation"
-            )
-            yield f"data: {flask.json.dumps({'error': error_msg})}\n\n"
+            yield f"data: {flask.json.dumps({'error': _generation_error_message(e)})}\n\n"
         finally:
             logger.info("Generation completed")
 
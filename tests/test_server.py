@@ -40,6 +40,28 @@ def test_api_conversation_get(conv, client: FlaskClient):
     assert response.status_code == 200
 
 
+def test_api_conversation_get_trimmed(conv, client: FlaskClient):
+    for content in ["first message", "second message", "third message"]:
+        response = client.post(
+            f"/api/conversations/{conv}",
+            json={"role": "user", "content": content},
+        )
+        assert response.status_code == 200
+
+    response = client.get(f"/api/conversations/{conv}?limit_messages=2&preview_chars=5")
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [msg["content"] for msg in data["log"]] == ["secon", "third"]
+    assert [msg["content"] for msg in data["branches"]["main"]] == ["secon", "third"]
+
+
+@pytest.mark.parametrize("param", ["limit_messages", "preview_chars"])
+def test_api_conversation_get_trimmed_negative(conv, client: FlaskClient, param):
+    response = client.get(f"/api/conversations/{conv}?{param}=-1")
+    assert response.status_code == 400
+    assert param in response.get_json()["error"]
+
+
 def test_api_conversation_post(conv, client: FlaskClient):
     response = client.post(
         f"/api/conversations/{conv}",
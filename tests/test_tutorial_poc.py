@@ -0,0 +1,175 @@
+"""Tests for the tutorial_poc.py client script."""
+
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("requests")
+
+# tutorial_poc.py is a standalone script at the repo root, not part of the package
+_spec = importlib.util.spec_from_file_location(
+    "tutorial_poc", Path(__file__).parent.parent / "tutorial_poc.py"
+)
+assert _spec and _spec.loader
+tutorial_poc = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(tutorial_poc)
+
+SSEDecoder = tutorial_poc.SSEDecoder
+SSEEvent = tutorial_poc.SSEEvent
+
+
+def test_sse_single_event():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"a": 1}\n\n') == [SSEEvent(data=b'{"a": 1}')]
+
+
+def test_sse_incomplete_event_is_buffered():
+    decoder = SSEDecoder()
+    assert decoder.feed(b"data: hel") == []
+    assert decoder.feed(b"lo\n") == []
+    assert decoder.feed(b"\n") == [SSEEvent(data=b"hello")]
+
+
+def test_sse_multiline_data():
+    decoder = SSEDecoder()
+    events = decoder.feed(b"data: first\ndata: second\ndata:third\n\n")
+    assert events == [SSEEvent(data=b"first\nsecond\nthird")]
+
+
+def test_sse_comments_skipped():
+    decoder = SSEDecoder()
+    events = decoder.feed(b": keepalive\n\ndata: x\n: inline comment\n\n")
+    assert events == [SSEEvent(data=b"x")]
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        [b"data: 1\r\n\r\ndata: 2\r\n\r\n"],
+        [b"data: 1\r", b"\n\r", b"\ndata: 2\r\n\r\n"],
+        [b"data: 1\r\rdata: 2\r\r"],
+        [b"data: 1\r", b"\r", b"data: 2\r", b"\r"],
+        [b"data: 1\n\ndata: 2\r\r"],
+    ],
+)
+def test_sse_line_endings(chunks: list[bytes]):
+    decoder = SSEDecoder()
+    events = [event for chunk in chunks for event in decoder.feed(chunk)]
+    assert [event.data for event in events] == [b"1", b"2"]
+
+
+def test_sse_event_and_id_fields():
+    decoder = SSEDecoder()
+    events = decoder.feed(b"event: token\nid: 7\ndata: a\n\ndata: b\n\n")
+    assert events == [
+        SSEEvent(data=b"a", event="token", id="7"),
+        # the last event ID carries over to later events
+        SSEEvent(data=b"b", event="message", id="7"),
+    ]
+    assert decoder.last_event_id == "7"
+
+
+def test_sse_retry_field_ignored():
+    decoder = SSEDecoder()
+    assert decoder.feed(b"retry: 1500\n\n") == []
+    assert decoder.feed(b"retry: 1500\ndata: x\n\n") == [SSEEvent(data=b"x")]
+
+
+def test_sse_utf8_split_across_chunks():
+    decoder = SSEDecoder()
+    payload = "data: héllo\n\n".encode()
+    split = payload.index(b"\xc3") + 1
+    assert decoder.feed(payload[:split]) == []
+    assert decoder.feed(payload[split:]) == [SSEEvent(data="héllo".encode())]
+
+
+@pytest.fixture
+def api_client(server_thread):
+    client = tutorial_poc.GPTMeAPIClient(f"http://localhost:{server_thread}")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def conv(api_client) -> str:
+    logfile = f"test-tutorial-poc-{random.randint(0, 1000000)}"
+    api_client.create_conversation(
+        logfile, messages=[{"role": "user", "content": "hello"}]
+    )
+    return logfile
+
+
+@pytest.fixture
+def server_api(monkeypatch):
+    """The in-process server's API module, with context preparation stubbed out."""
+    from gptme.server import api
+
+    # token counting/context enrichment isn't under test here
+    monkeypatch.setattr(api, "prepare_messages", lambda msgs, workspace=None: msgs)
+    return api
+
+
+def test_generate_fallback_tries_next_model(api_client, conv, server_api, monkeypatch):
+    tried = []
+
+    def fake_stream(msgs, model, tools=None):
+        tried.append(model)
+        if model == "nonexistent/model":
+            raise ValueError(f"Unknown model: {model}")
+        yield "hello from fallback"
+
+    monkeypatch.setattr(server_api, "_stream", fake_stream)
+    response = api_client.generate_response_with_fallback(
+        conv, models=["nonexistent/model", "test/fallback"]
+    )
+    assert tried == ["nonexistent/model", "test/fallback"]
+    assert response[0]["content"] == "hello from fallback"
+
+
+def test_generate_fallback_all_rejected(api_client, conv, server_api, monkeypatch):
+    def fake_stream(msgs, model, tools=None):
+        raise ValueError(f"Unknown model: {model}")
+        yield
+
+    monkeypatch.setattr(server_api, "_stream", fake_stream)
+    # the last model is retried with backoff, skip the sleeps
+    monkeypatch.setattr(tutorial_poc.time, "sleep", lambda _: None)
+    response = api_client.generate_response_with_fallback(
+        conv, models=["nonexistent/a", "nonexistent/b"]
+    )
+    assert response is tutorial_poc.GENERATION_UNAVAILABLE
+
+
+def test_get_conversation_trims_untrimmed_response(api_client, conv, monkeypatch):
+    from gptme.server import api
+
+    for content in ["second message", "third message"]:
+        api_client.add_message(conv, "user", content)
+    # simulate an older server that ignores the trim parameters
+    monkeypatch.setattr(api, "_trim_messages", lambda msgs, *_: msgs)
+    data = api_client.get_conversation(conv, limit_messages=2, preview_chars=5)
+    assert [msg["content"] for msg in data["log"]] == ["secon", "third"]
+    assert [msg["content"] for msg in data["branches"]["main"]] == ["secon", "third"]
+
+
+def test_get_conversations_details(api_client, monkeypatch):
+    logfiles = [f"test-tutorial-poc-{random.randint(0, 1000000)}-{i}" for i in range(3)]
+    for logfile in logfiles:
+        api_client.create_conversation(
+            logfile, messages=[{"role": "user", "content": logfile}]
+        )
+
+    pool_sizes = []
+
+    class RecordingExecutor(tutorial_poc.ThreadPoolExecutor):
+        def __init__(self, max_workers=None):
+            pool_sizes.append(max_workers)
+            super().__init__(max_workers=max_workers)
+
+    monkeypatch.setattr(tutorial_poc, "ThreadPoolExecutor", RecordingExecutor)
+    details = api_client.get_conversations_details(logfiles, max_workers=64)
+    # results keep the order of the request, and workers don't outnumber the pool
+    assert [data["log"][-1]["content"] for data in details] == logfiles
+    assert pool_sizes == [api_client._POOL_MAXSIZE]